@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Query, HTTPException, Path
 from typing import Optional, List
-from services.aws_service import AWSService
+from services.storage import get_storage_backend
+from services.resilience import CircuitOpenError, DeadlineExceededError
 
 router = APIRouter(tags=["Images"])
 
-aws_service = AWSService()
+storage = get_storage_backend()
 
 @router.get(
     "/images",
@@ -36,10 +37,12 @@ aws_service = AWSService()
             }
         },
         400: {"description": "Invalid filter values"},
-        500: {"description": "Internal server error"}
+        500: {"description": "Internal server error"},
+        503: {"description": "Storage backend unavailable (circuit open)"},
+        504: {"description": "Storage backend did not respond in time"},
     }
 )
-async def list_images(
+def list_images(
     user_id: Optional[str] = Query(None, description="Filter images by user ID"),
     tag: Optional[str] = Query(None, description="Filter images by tag keyword")
 ):
@@ -51,7 +54,7 @@ async def list_images(
         if tag:
             filters["tag"] = tag
 
-        images = aws_service.query_images(filters)
+        images = storage.query_images(filters)
         return {"images": images}
 
     except ValueError as ve:
@@ -59,6 +62,10 @@ async def list_images(
             status_code=400,
             detail=str(ve)
         )
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -88,22 +95,24 @@ async def list_images(
             }
         },
         404: {"description": "Image not found"},
-        500: {"description": "Failed to generate download URL"}
+        500: {"description": "Failed to generate download URL"},
+        503: {"description": "Storage backend unavailable (circuit open)"},
+        504: {"description": "Storage backend did not respond in time"},
     }
 )
-async def get_image(
+def get_image(
     image_id: str = Path(..., description="Unique ID of the image to view or download")
 ):
 
     try:
 
-        metadata = aws_service.get_image_metadata(image_id)
+        metadata = storage.get_image_metadata(image_id)
         if not metadata:
             raise HTTPException(
                 status_code=404,
                 detail="Image not found"
             )
-        presigned_url = aws_service.generate_presigned_url(metadata["image_url"])
+        presigned_url = storage.generate_presigned_url(storage.get_s3_key(metadata))
         return {
             "image_id": image_id,
             "user_id": metadata.get("user_id"),
@@ -113,6 +122,10 @@ async def get_image(
 
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -138,34 +151,40 @@ async def get_image(
         },
         404: {"description": "Image not found"},
         500: {"description": "Failed to delete image"},
+        503: {"description": "Storage backend unavailable (circuit open)"},
+        504: {"description": "Storage backend did not respond in time"},
     },
 )
-async def delete_image(
+def delete_image(
     image_id: str = Path(..., description="Unique ID of the image to delete")
 ):
 
     try:
-        metadata = aws_service.get_image_metadata(image_id)
+        metadata = storage.get_image_metadata(image_id)
         if not metadata:
             raise HTTPException(
                 status_code=404,
                 detail="Image not found"
             )
 
-        s3_key = metadata.get("s3_key")
+        s3_key = storage.get_s3_key(metadata)
         if not s3_key:
             raise HTTPException(
                 status_code=400,
                 detail="S3 key not found in metadata"
             )
 
-        aws_service.delete_image_from_s3(s3_key)
-        aws_service.delete_metadata_from_dynamo(image_id)
+        storage.delete_image_from_s3(s3_key)
+        storage.delete_metadata_from_dynamo(image_id)
 
         return {"message": "Image deleted successfully", "image_id": image_id}
 
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
-from services.aws_service import AWSService
+from services.storage import get_storage_backend
+from services.resilience import CircuitOpenError, DeadlineExceededError, set_request_deadline
 from utils.common import current_timestamp
+from utils.config import settings
 
 router = APIRouter(tags=["Upload"])
 
-aws_service = AWSService()
+storage = get_storage_backend()
 
 
 @router.post(
@@ -18,7 +20,7 @@ aws_service = AWSService()
         **Workflow:**
         1. The image is uploaded to S3.
         2. A public image URL is generated.
-        3. Metadata (user_id, description, tags, uploaded_at, etc.) is stored in DynamoDB.
+        3. Metadata (user_id, description, tags, s3_key, uploaded_at, etc.) is stored in DynamoDB.
         4. A success response is returned with image details.
         """,
     responses={
@@ -36,17 +38,20 @@ aws_service = AWSService()
                             "description": "Sunset view",
                             "tags": ["travel", "nature", "evening"],
                             "image_url": "https://my-instagram-images.s3.ap-south-1.amazonaws.com/uploads/12345/a37c3b58-8a11-47a4-a098-c5f0918b42b7.jpg",
+                            "s3_key": "uploads/12345/a37c3b58-8a11-47a4-a098-c5f0918b42b7.jpg",
                             "uploaded_at": "2025-10-22T09:32:11.123456"
                         }
                     }
                 }
             },
         },
-        400: {"description": "Bad Request — Invalid input data"},
+        400: {"description": "Bad Request — Invalid input data or user_id"},
         500: {"description": "Internal Server Error — Upload or DB operation failed"},
+        503: {"description": "Service Unavailable — Storage backend circuit is open"},
+        504: {"description": "Gateway Timeout — Storage backend did not respond in time"},
     },
 )
-async def upload_image(
+def upload_image(
     user_id: str = Form(..., description="Unique ID of the user uploading the image"),
     description: str = Form(None, description="Optional description of the image"),
     tags: str = Form(None, description="Comma-separated list of tags for the image"),
@@ -58,17 +63,21 @@ async def upload_image(
 
     try:
         # Generate S3 key and unique image_id
-        s3_key, image_id = aws_service.generate_image_key(user_id, image.filename)
+        s3_key, image_id = storage.generate_image_key(user_id, image.filename)
 
         # Upload image to S3
-        aws_service.upload_image_to_s3(
+        storage.upload_image_to_s3(
             file_obj=image.file,
             key=s3_key,
             content_type=image.content_type
         )
 
+        # The upload runs on its own timeout outside the request budget, so the
+        # metadata write starts a fresh budget (this handler's context is discarded after).
+        set_request_deadline(settings.REQUEST_TIMEOUT_SECONDS)
+
         # Generate image URL
-        image_url = aws_service.get_image_url(s3_key)
+        image_url = storage.get_image_url(s3_key)
 
         # Prepare metadata
         metadata = {
@@ -77,11 +86,12 @@ async def upload_image(
             "description": description or "",
             "tags": tags.split(",") if tags else [],
             "image_url": image_url,
+            "s3_key": s3_key,
             "uploaded_at": current_timestamp(),
         }
 
         # Save metadata in DynamoDB
-        aws_service.save_image_metadata(metadata)
+        storage.save_image_metadata(metadata)
 
         return JSONResponse(
             content={
@@ -93,5 +103,11 @@ async def upload_image(
             status_code=201,
         )
 
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
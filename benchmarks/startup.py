@@ -0,0 +1,113 @@
+"""
+Cold-start benchmark for the serverless entrypoint.
+
+Each sample runs in a fresh interpreter and measures:
+
+- ``import_ms``: importing ``serverless`` (app, routers, logger, settings)
+- ``first_request_ms``: the first request through the Lambda handler
+- ``client_init_ms``: creating the S3 and DynamoDB clients on first use
+
+The median of all samples is compared against the budgets, and the script exits
+non-zero when any budget is exceeded so it can gate CI.
+
+    python -m benchmarks.startup --runs 5 --import-budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json
+import time
+
+start = time.perf_counter()
+import serverless
+imported = time.perf_counter()
+
+event = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": "/",
+    "rawQueryString": "",
+    "headers": {"host": "localhost"},
+    "requestContext": {
+        "http": {"method": "GET", "path": "/", "sourceIp": "127.0.0.1", "protocol": "HTTP/1.1"},
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+response = serverless.handler(event, None)
+responded = time.perf_counter()
+assert response["statusCode"] == 200, response
+
+from api.routes import image
+image.storage.s3_client
+image.storage.table
+initialized = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (responded - imported) * 1000,
+    "client_init_ms": (initialized - responded) * 1000,
+}))
+"""
+
+
+def run_sample() -> dict:
+
+    # The probe measures S3/DynamoDB client creation, so the AWS backend is pinned.
+    env = dict(os.environ, SERVERLESS="true", STORAGE_BACKEND="aws")
+    env.setdefault("AWS_REGION", "us-east-1")
+    env.setdefault("S3_BUCKET", "benchmark-bucket")
+    env.setdefault("DYNAMO_TABLE", "benchmark-table")
+    env.setdefault("AWS_ENDPOINT_URL", "http://localhost:4566")
+    env.setdefault("LOCALSTACK_AUTH_TOKEN", "benchmark")
+    env.setdefault("LOG_LEVEL", "INFO")
+
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description="Measure serverless cold-start time against a budget.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to sample")
+    parser.add_argument("--import-budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 1500)))
+    parser.add_argument("--first-request-budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_MS", 250)))
+    parser.add_argument("--client-init-budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_CLIENT_INIT_BUDGET_MS", 1000)))
+    args = parser.parse_args()
+
+    samples = [run_sample() for _ in range(args.runs)]
+    budgets = {
+        "import_ms": args.import_budget_ms,
+        "first_request_ms": args.first_request_budget_ms,
+        "client_init_ms": args.client_init_budget_ms,
+    }
+
+    failed = False
+    for metric, budget in budgets.items():
+        median = statistics.median(sample[metric] for sample in samples)
+        status = "ok" if median <= budget else "OVER BUDGET"
+        failed = failed or median > budget
+        print(f"{metric:<18} median={median:8.1f}ms  budget={budget:8.1f}ms  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
-import uvicorn
-from fastapi import FastAPI, status
+from fastapi import FastAPI, Request, status
 from contextlib import asynccontextmanager
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from services.logger import logger
+from services.resilience import breaker_metrics, reset_request_deadline, set_request_deadline
+from utils.config import settings
 from api.routes import upload, image
 
 @asynccontextmanager
@@ -29,6 +30,24 @@ async def health_check():
     )
 
 
+@app.get("/metrics", tags=["System"])
+async def metrics():
+    return JSONResponse(
+        content={"circuit_breakers": breaker_metrics()},
+        status_code=status.HTTP_200_OK
+    )
+
+
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    # AWS calls made while handling the request clamp their timeouts to this budget.
+    token = set_request_deadline(settings.REQUEST_TIMEOUT_SECONDS)
+    try:
+        return await call_next(request)
+    finally:
+        reset_request_deadline(token)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,4 +60,6 @@ app.include_router(upload.router ,prefix="/api/v1")
 app.include_router(image.router ,prefix="/api/v1")
 
 if __name__ == '__main__':
+    import uvicorn
+
     uvicorn.run("app:app", port=8001, host="localhost", reload=True)
\ No newline at end of file
@@ -0,0 +1,16 @@
+"""
+Serverless entrypoint for running the API behind AWS Lambda.
+
+Point the Lambda handler at ``serverless.handler``. Serverless mode is switched
+on before the app is imported so configuration is read from the environment
+only, logs go to stdout, and AWS clients are created on first use.
+"""
+import os
+
+os.environ.setdefault("SERVERLESS", "true")
+
+from mangum import Mangum
+
+from main import app
+
+handler = Mangum(app, lifespan="off")
@@ -1,15 +1,80 @@
-import boto3
+import threading
+from typing import Optional
+from urllib.parse import urlparse
+
 from botocore.exceptions import ClientError
 
-from utils.common import generate_uuid
+from services.resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    LatencyTracker,
+    call_with_deadline,
+    call_with_timeout,
+    get_breaker,
+    hedged_call,
+)
+from services.storage import StorageBackend
 from utils.config import settings
 
 
+class _CancellableReader:
+    """
+    File wrapper for uploads. Once cancelled, reads raise instead of touching the
+    file, so an upload abandoned after its deadline stops reading from a request
+    body FastAPI may already have closed. The lock makes cancel() wait for any
+    read in progress.
+    """
+
+    def __init__(self, file_obj):
+        self._file_obj = file_obj
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def read(self, size: int = -1) -> bytes:
+        with self._lock:
+            if self._cancelled:
+                raise IOError("Upload cancelled")
+            return self._file_obj.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        with self._lock:
+            if self._cancelled:
+                raise IOError("Upload cancelled")
+            return self._file_obj.seek(offset, whence)
+
+    def tell(self) -> int:
+        with self._lock:
+            return self._file_obj.tell()
 
+    def seekable(self) -> bool:
+        return self._file_obj.seekable()
 
-class AWSService:
+    def close(self):
+        # The request body belongs to FastAPI, which closes it itself.
+        pass
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+
+
+# Latency of primary get_item attempts, shared by all AWSService instances so the
+# hedging delay reflects the whole process.
+_get_item_latency = LatencyTracker()
+
+
+class AWSService(StorageBackend):
     """
     A service class for managing AWS S3 and DynamoDB operations.
+
+    boto3 is imported and the clients are created on first use rather than at
+    construction, so importing the app (e.g. on a serverless cold start) stays
+    cheap and routes that never touch AWS never pay for it.
+
+    Every network call runs under a deadline (the per-operation timeout clamped
+    to the remaining request budget) and through a per-backend circuit breaker.
+    Uploads are the exception: they get AWS_UPLOAD_TIMEOUT_SECONDS on their own
+    client, independent of the request budget.
     """
 
     def __init__(self):
@@ -18,27 +83,97 @@ class AWSService:
         self.s3_bucket = settings.S3_BUCKET
         self.dynamo_table = settings.DYNAMO_TABLE
 
-        self.s3_client = boto3.client("s3",
+        # Clients are created once, on first use, even when the first requests arrive
+        # concurrently on the threadpool. Reentrant because table builds dynamo_resource.
+        self._clients_lock = threading.RLock()
+        self._boto_session = None
+        self._s3_client = None
+        self._upload_s3_client = None
+        self._dynamo_resource = None
+        self._table = None
+
+        self.s3_breaker = get_breaker("s3")
+        self.dynamo_breaker = get_breaker("dynamodb")
+
+
+    def _client_config(self, timeout: float = None):
+
+        from botocore.config import Config
+
+        timeout = timeout or settings.AWS_OPERATION_TIMEOUT_SECONDS
+        return Config(
+            connect_timeout=settings.AWS_OPERATION_TIMEOUT_SECONDS,
+            read_timeout=timeout,
+            retries={"max_attempts": 2, "mode": "standard"},
+        )
+
+
+    def _session(self):
+        # boto3's default session is not safe to share across threads, so each
+        # service creates clients from its own. Callers hold self._clients_lock.
+
+        if self._boto_session is None:
+            import boto3.session
+
+            self._boto_session = boto3.session.Session()
+        return self._boto_session
+
+
+    def _create_s3_client(self, timeout: float = None):
+
+        return self._session().client("s3",
                                       region_name=self.region,
                                       endpoint_url=settings.AWS_ENDPOINT_URL,
                                       aws_access_key_id="test",
                                       aws_secret_access_key="test",
+                                      config=self._client_config(timeout),
                                       )
-        self.dynamo_resource = boto3.resource("dynamodb",
-                                              region_name=self.region,
-                                              endpoint_url = settings.AWS_ENDPOINT_URL,
-                                              aws_access_key_id = "test",
-                                              aws_secret_access_key = "test"
-                                              )
-        self.table = self.dynamo_resource.Table(self.dynamo_table)
 
 
-    def generate_image_key(self, user_id: str, filename: str):
+    @property
+    def s3_client(self):
+
+        if self._s3_client is None:
+            with self._clients_lock:
+                if self._s3_client is None:
+                    self._s3_client = self._create_s3_client()
+        return self._s3_client
+
+
+    @property
+    def upload_s3_client(self):
+
+        if self._upload_s3_client is None:
+            with self._clients_lock:
+                if self._upload_s3_client is None:
+                    self._upload_s3_client = self._create_s3_client(settings.AWS_UPLOAD_TIMEOUT_SECONDS)
+        return self._upload_s3_client
+
+
+    @property
+    def dynamo_resource(self):
 
-        ext = filename.split(".")[-1]
-        image_id = generate_uuid()
-        key = f"uploads/{user_id}/{image_id}.{ext}"
-        return key, image_id
+        if self._dynamo_resource is None:
+            with self._clients_lock:
+                if self._dynamo_resource is None:
+                    self._dynamo_resource = self._session().resource("dynamodb",
+                                                                     region_name=self.region,
+                                                                     endpoint_url = settings.AWS_ENDPOINT_URL,
+                                                                     aws_access_key_id = "test",
+                                                                     aws_secret_access_key = "test",
+                                                                     config=self._client_config(),
+                                                                     )
+        return self._dynamo_resource
+
+
+    @property
+    def table(self):
+
+        if self._table is None:
+            with self._clients_lock:
+                if self._table is None:
+                    self._table = self.dynamo_resource.Table(self.dynamo_table)
+        return self._table
 
 
     def get_image_url(self, key: str) -> str:
@@ -47,15 +182,47 @@ class AWSService:
         return f"https://{self.s3_bucket}.s3.{self.region}.amazonaws.com/{key}"
 
 
+    def get_s3_key(self, metadata: dict) -> Optional[str]:
+        """
+            Return the S3 key of an image record. Records written before s3_key was
+            stored only carry image_url, so the key is recovered from it. Returns None
+            when the URL does not point into this service's bucket.
+        """
+
+        if metadata.get("s3_key"):
+            return metadata["s3_key"]
+
+        parsed = urlparse(metadata.get("image_url") or "")
+        path = parsed.path.lstrip("/")
+
+        # Virtual-hosted style: https://<bucket>.s3.<region>.amazonaws.com/<key>
+        if parsed.netloc.startswith(f"{self.s3_bucket}."):
+            return path or None
+
+        # Path style (LocalStack): <endpoint>/<bucket>/<key>
+        bucket_prefix = f"{self.s3_bucket}/"
+        if path.startswith(bucket_prefix):
+            return path[len(bucket_prefix):] or None
+        return None
+
+
     def upload_image_to_s3(self, file_obj, key: str, content_type: str):
 
+        reader = _CancellableReader(file_obj)
         try:
-            self.s3_client.upload_fileobj(
-                file_obj,
+            call_with_timeout(
+                self.s3_breaker,
+                settings.AWS_UPLOAD_TIMEOUT_SECONDS,
+                self.upload_s3_client.upload_fileobj,
+                reader,
                 self.s3_bucket,
                 key,
+                pool="s3-upload",
                 ExtraArgs={"ContentType": content_type}
             )
+        except DeadlineExceededError:
+            reader.cancel()
+            raise
         except ClientError as e:
             raise RuntimeError(f"Failed to upload image to S3: {e}")
 
@@ -63,7 +230,12 @@ class AWSService:
     def save_image_metadata(self, metadata: dict):
 
         try:
-            self.table.put_item(Item=metadata)
+            call_with_deadline(
+                self.dynamo_breaker,
+                settings.AWS_OPERATION_TIMEOUT_SECONDS,
+                self.table.put_item,
+                Item=metadata
+            )
         except ClientError as e:
             raise RuntimeError(f"Failed to save metadata to DynamoDB: {e}")
 
@@ -90,25 +262,61 @@ class AWSService:
             if filter_expression:
                 scan_kwargs["FilterExpression"] = filter_expression
 
-            response = self.table.scan(**scan_kwargs)
+            response = self._scan_page(**scan_kwargs)
             items = response.get("Items", [])
 
             while "LastEvaluatedKey" in response:
-                response = self.table.scan(ExclusiveStartKey=response["LastEvaluatedKey"], **scan_kwargs)
+                response = self._scan_page(ExclusiveStartKey=response["LastEvaluatedKey"], **scan_kwargs)
                 items.extend(response.get("Items", []))
 
             return items
 
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Error querying DynamoDB: {str(e)}")
 
 
 
-    def get_image_metadata(self, image_id: str) -> dict:
+    def _scan_page(self, **scan_kwargs) -> dict:
+
+        return call_with_deadline(
+            self.dynamo_breaker,
+            settings.AWS_OPERATION_TIMEOUT_SECONDS,
+            self.table.scan,
+            **scan_kwargs
+        )
+
+
+    def get_image_metadata(self, image_id: str, hedge: Optional[bool] = None) -> dict:
+        """
+            Fetch an image's metadata. With hedging (HEDGED_READS by default), a second
+            get_item is sent once the first has been outstanding for the observed p95.
+        """
+
+        hedge = settings.HEDGED_READS if hedge is None else hedge
 
         try:
-            response = self.table.get_item(Key={"image_id": image_id})
+            if hedge:
+                delay = _get_item_latency.percentile(0.95)
+                response = hedged_call(
+                    self.dynamo_breaker,
+                    settings.AWS_OPERATION_TIMEOUT_SECONDS,
+                    settings.HEDGE_DELAY_MS / 1000 if delay is None else delay,
+                    _get_item_latency,
+                    self.table.get_item,
+                    Key={"image_id": image_id}
+                )
+            else:
+                response = call_with_deadline(
+                    self.dynamo_breaker,
+                    settings.AWS_OPERATION_TIMEOUT_SECONDS,
+                    self.table.get_item,
+                    Key={"image_id": image_id}
+                )
             return response.get("Item")
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Error fetching image metadata: {str(e)}")
 
@@ -128,13 +336,28 @@ class AWSService:
     def delete_image_from_s3(self, s3_key: str):
 
         try:
-            self.s3_client.delete_object(Bucket=self.s3_bucket, Key=s3_key)
+            call_with_deadline(
+                self.s3_breaker,
+                settings.AWS_OPERATION_TIMEOUT_SECONDS,
+                self.s3_client.delete_object,
+                Bucket=self.s3_bucket,
+                Key=s3_key
+            )
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to delete image from S3: {str(e)}")
 
     def delete_metadata_from_dynamo(self, image_id: str):
 
         try:
-            self.table.delete_item(Key={"image_id": image_id})
+            call_with_deadline(
+                self.dynamo_breaker,
+                settings.AWS_OPERATION_TIMEOUT_SECONDS,
+                self.table.delete_item,
+                Key={"image_id": image_id}
+            )
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to delete metadata from DynamoDB: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,124 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from services.storage import StorageBackend
+
+
+class LocalStorage(StorageBackend):
+    """
+    Storage backend writing image files under a local directory and metadata to SQLite.
+
+    Layout under root_dir:
+        objects/<key>   image files, at the same keys S3 would use
+        metadata.db     SQLite database with images and image_tags tables
+
+    user_id and tag lookups are served by SQLite indexes.
+    """
+
+    def __init__(self, root_dir: str):
+
+        self.root = Path(root_dir).resolve()
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "metadata.db"), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                "image_id TEXT PRIMARY KEY, user_id TEXT, data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_images_user_id ON images (user_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_tags ("
+                "tag TEXT NOT NULL, image_id TEXT NOT NULL, PRIMARY KEY (tag, image_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_image_id ON image_tags (image_id)")
+
+
+    def _object_path(self, key: str) -> Path:
+
+        path = (self.objects_dir / key).resolve()
+        if not path.is_relative_to(self.objects_dir):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+
+    def get_image_url(self, key: str) -> str:
+        return self._object_path(key).as_uri()
+
+
+    def upload_image_to_s3(self, file_obj, key: str, content_type: str):
+
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial image.
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            while chunk := file_obj.read(1024 * 1024):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+
+    def save_image_metadata(self, metadata: dict):
+
+        image_id = metadata["image_id"]
+        tags = metadata.get("tags") or []
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (image_id, user_id, data) VALUES (?, ?, ?)",
+                (image_id, metadata.get("user_id"), json.dumps(metadata, default=str)),
+            )
+            self._conn.execute("DELETE FROM image_tags WHERE image_id = ?", (image_id,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO image_tags (tag, image_id) VALUES (?, ?)",
+                [(tag, image_id) for tag in tags],
+            )
+
+
+    def query_images(self, filters: dict) -> list:
+
+        query = "SELECT data FROM images"
+        conditions, params = [], []
+        if "user_id" in filters:
+            conditions.append("user_id = ?")
+            params.append(filters["user_id"])
+        if "tag" in filters:
+            conditions.append("image_id IN (SELECT image_id FROM image_tags WHERE tag = ?)")
+            params.append(filters["tag"])
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY rowid"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+    def get_image_metadata(self, image_id: str) -> Optional[dict]:
+
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM images WHERE image_id = ?", (image_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+    def generate_presigned_url(self, s3_key: str, expires_in: int = 3600) -> str:
+        return self.get_image_url(s3_key)
+
+
+    def delete_image_from_s3(self, s3_key: str):
+
+        self._object_path(s3_key).unlink(missing_ok=True)
+
+
+    def delete_metadata_from_dynamo(self, image_id: str):
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM image_tags WHERE image_id = ?", (image_id,))
+            self._conn.execute("DELETE FROM images WHERE image_id = ?", (image_id,))
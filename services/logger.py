@@ -1,24 +1,34 @@
 import datetime
 import json
 import os
+import sys
 import logging
 import structlog
 from utils.config import settings
-from logging.handlers import RotatingFileHandler
 
-if not os.path.exists(settings.LOG_DIR):
-    os.makedirs(settings.LOG_DIR)
 
-log_file = os.path.join(settings.LOG_DIR, "app.log")
+def _build_handlers() -> list:
+    # Serverless runtimes collect stdout, and their filesystem is read-only or
+    # ephemeral, so no log directory or rotating file is created there.
+    if settings.SERVERLESS:
+        return [logging.StreamHandler(sys.stdout)]
+
+    from logging.handlers import RotatingFileHandler
+
+    if not os.path.exists(settings.LOG_DIR):
+        os.makedirs(settings.LOG_DIR)
+
+    log_file = os.path.join(settings.LOG_DIR, "app.log")
+    return [
+        RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5),
+        logging.StreamHandler()  # keep console logs too
+    ]
 
 
 logging.basicConfig(
     format="%(message)s",
     level=settings.LOG_LEVEL,
-    handlers=[
-        RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5),
-        logging.StreamHandler()  # keep console logs too
-    ],
+    handlers=_build_handlers(),
 )
 
 def custom_json_renderer(_, __, event_dict):
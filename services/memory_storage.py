@@ -0,0 +1,127 @@
+import threading
+from typing import Dict, Optional
+
+from services.storage import StorageBackend
+
+
+class InMemoryStorage(StorageBackend):
+    """
+    Process-local storage backend keeping objects and metadata in dictionaries.
+
+    Metadata is indexed by user_id and by tag, so filtered listings only touch
+    matching records instead of scanning everything. Indexes are insertion-ordered
+    dicts used as sets, which keeps query results deterministic.
+    """
+
+    def __init__(self):
+
+        self._lock = threading.RLock()
+        self._objects: Dict[str, tuple] = {}
+        self._metadata: Dict[str, dict] = {}
+        self._by_user: Dict[str, Dict[str, None]] = {}
+        self._by_tag: Dict[str, Dict[str, None]] = {}
+
+
+    def get_image_url(self, key: str) -> str:
+        return f"memory://images/{key}"
+
+
+    def upload_image_to_s3(self, file_obj, key: str, content_type: str):
+
+        data = file_obj.read()
+        with self._lock:
+            self._objects[key] = (data, content_type)
+
+
+    def get_object(self, key: str) -> Optional[tuple]:
+        """
+            Return (data, content_type) for a stored object, or None.
+        """
+        with self._lock:
+            return self._objects.get(key)
+
+
+    def save_image_metadata(self, metadata: dict):
+
+        image_id = metadata["image_id"]
+        with self._lock:
+            self._unindex(image_id)
+            self._metadata[image_id] = self._copy(metadata)
+            self._by_user.setdefault(metadata.get("user_id"), {})[image_id] = None
+            for tag in metadata.get("tags") or []:
+                self._by_tag.setdefault(tag, {})[image_id] = None
+
+
+    def query_images(self, filters: dict) -> list:
+
+        with self._lock:
+            indexes = []
+            if "user_id" in filters:
+                indexes.append(self._by_user.get(filters["user_id"], {}))
+            if "tag" in filters:
+                indexes.append(self._by_tag.get(filters["tag"], {}))
+
+            if not indexes:
+                image_ids = self._metadata
+            else:
+                indexes.sort(key=len)
+                smallest, rest = indexes[0], indexes[1:]
+                image_ids = [image_id for image_id in smallest if all(image_id in index for index in rest)]
+
+            return [self._copy(self._metadata[image_id]) for image_id in image_ids]
+
+
+    def get_image_metadata(self, image_id: str) -> Optional[dict]:
+
+        with self._lock:
+            metadata = self._metadata.get(image_id)
+            return self._copy(metadata) if metadata is not None else None
+
+
+    def generate_presigned_url(self, s3_key: str, expires_in: int = 3600) -> str:
+        return f"{self.get_image_url(s3_key)}?expires_in={expires_in}"
+
+
+    def delete_image_from_s3(self, s3_key: str):
+
+        with self._lock:
+            self._objects.pop(s3_key, None)
+
+
+    def delete_metadata_from_dynamo(self, image_id: str):
+
+        with self._lock:
+            self._unindex(image_id)
+            self._metadata.pop(image_id, None)
+
+
+    def _unindex(self, image_id: str):
+
+        metadata = self._metadata.get(image_id)
+        if metadata is None:
+            return
+
+        self._discard(self._by_user, metadata.get("user_id"), image_id)
+        for tag in metadata.get("tags") or []:
+            self._discard(self._by_tag, tag, image_id)
+
+
+    @staticmethod
+    def _copy(metadata: dict) -> dict:
+        # Records are flat apart from the tags list, so a shallow copy plus a copy
+        # of the list is enough to keep callers from mutating stored state.
+        result = dict(metadata)
+        if isinstance(result.get("tags"), list):
+            result["tags"] = list(result["tags"])
+        return result
+
+
+    @staticmethod
+    def _discard(index: dict, value, image_id: str):
+
+        entries = index.get(value)
+        if entries is None:
+            return
+        entries.pop(image_id, None)
+        if not entries:
+            del index[value]
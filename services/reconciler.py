@@ -0,0 +1,292 @@
+"""
+Reconciles image objects in S3 against their metadata in DynamoDB.
+
+Uploads write to S3 and then DynamoDB, and deletes remove from S3 and then
+DynamoDB, so a failure in between leaves either an orphaned object (stored and
+billed, but unreachable) or dangling metadata (pointing at a missing object).
+
+Both sides are streamed page by page and matched through Bloom filters, so
+memory stays bounded by the filter size rather than the number of keys:
+
+1. scan DynamoDB and add every record's S3 key to a filter;
+2. list S3 and report objects whose key is not in that filter, adding every
+   listed key to a second filter;
+3. scan DynamoDB again and report records whose key is not in the second
+   filter, confirming each with a HEAD request before it is reported.
+
+A Bloom filter never gives false negatives, so an object or record is only
+reported when its counterpart is definitely absent; false positives only make
+a run miss some orphans, which the next run picks up. Anything younger than
+the grace period is skipped, which also covers uploads and deletes still in
+flight while the job runs.
+
+A record whose S3 key cannot be worked out (no s3_key, and an image_url that
+is missing or points at another bucket) could be the only reference to a live
+object. Such records are reported as unresolved, and no object under that
+user's prefix is reported or deleted as an orphan; without a user_id, the
+orphan pass is skipped altogether.
+
+A run can be limited to some users' prefixes. The table is keyed by image_id
+only, so without an index each metadata pass is still one full scan (shared by
+all requested users, not repeated per user). Setting DYNAMO_USER_INDEX to a GSI
+with user_id as its partition key, projecting s3_key, image_url and
+uploaded_at, makes per-user runs read only those users' records via query.
+
+    python -m services.reconciler --user-id 12345 --grace-hours 24 --delete
+"""
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from services.aws_service import AWSService
+from services.logger import logger
+from utils.bloom import BloomFilter
+from utils.config import settings
+
+
+UPLOADS_PREFIX = "uploads/"
+S3_DELETE_BATCH_SIZE = 1000
+REPORT_SAMPLE_SIZE = 100
+
+
+class Reconciler:
+    """
+    Finds, and optionally deletes, orphaned S3 objects and dangling DynamoDB records.
+    """
+
+    def __init__(self, aws_service: Optional[AWSService] = None,
+                 grace_seconds: float = settings.RECONCILE_GRACE_SECONDS,
+                 expected_keys: int = settings.RECONCILE_EXPECTED_KEYS,
+                 error_rate: float = 0.01):
+
+        self.aws = aws_service or AWSService()
+        self.grace = timedelta(seconds=grace_seconds)
+        self.expected_keys = expected_keys
+        self.error_rate = error_rate
+
+
+    def reconcile(self, user_ids: Optional[list] = None, delete: bool = False) -> dict:
+        """
+            Run one reconciliation pass over all of uploads/, or only over the given users' prefixes.
+        """
+
+        prefixes = [f"{UPLOADS_PREFIX}{user_id}/" for user_id in user_ids] if user_ids else [UPLOADS_PREFIX]
+        logger.info("reconcile_start", prefixes=prefixes, delete=delete)
+
+        metadata_keys = BloomFilter(self.expected_keys, self.error_rate)
+        unresolved_metadata = self._new_section()
+        unresolved_users = set()
+        skip_all_orphans = False
+        for item in self._read_metadata(user_ids):
+            key = self.aws.get_s3_key(item)
+            if key:
+                metadata_keys.add(key)
+                continue
+
+            self._count(unresolved_metadata, item.get("image_id"))
+            if item.get("user_id"):
+                unresolved_users.add(item["user_id"])
+            else:
+                skip_all_orphans = True
+        self._check_capacity("metadata_keys", metadata_keys.count)
+
+        if unresolved_metadata["count"]:
+            logger.warning("reconcile_unresolved_metadata", count=unresolved_metadata["count"],
+                           users=sorted(unresolved_users)[:REPORT_SAMPLE_SIZE],
+                           skip_all_orphans=skip_all_orphans)
+
+        object_keys = BloomFilter(self.expected_keys, self.error_rate)
+        orphaned_objects = self._new_section()
+        orphaned_objects["skipped"] = 0
+        batch = []
+        for prefix in prefixes:
+            for key in self.find_orphaned_objects(prefix, metadata_keys, object_keys):
+                if skip_all_orphans or self._user_of(key) in unresolved_users:
+                    orphaned_objects["skipped"] += 1
+                    continue
+                self._count(orphaned_objects, key)
+                if delete:
+                    batch.append(key)
+                    if len(batch) == S3_DELETE_BATCH_SIZE:
+                        orphaned_objects["deleted"] += self._delete_objects(batch)
+                        batch = []
+        if batch:
+            orphaned_objects["deleted"] += self._delete_objects(batch)
+
+        self._check_capacity("object_keys", object_keys.count)
+
+        dangling_metadata = self._new_section()
+        for item in self.find_dangling_metadata(user_ids, object_keys):
+            self._count(dangling_metadata, item["image_id"])
+            if delete:
+                self.aws.delete_metadata_from_dynamo(item["image_id"])
+                dangling_metadata["deleted"] += 1
+
+        report = {
+            "prefixes": prefixes,
+            "orphaned_objects": orphaned_objects,
+            "dangling_metadata": dangling_metadata,
+            "unresolved_metadata": unresolved_metadata,
+        }
+        logger.info("reconcile_complete", prefixes=prefixes,
+                    orphaned_objects=orphaned_objects["count"],
+                    dangling_metadata=dangling_metadata["count"],
+                    unresolved_metadata=unresolved_metadata["count"])
+        return report
+
+
+    def find_orphaned_objects(self, prefix: str, metadata_keys: BloomFilter, seen_keys: BloomFilter):
+        """
+            Yield keys under prefix that no metadata record refers to, recording every
+            listed key in seen_keys.
+        """
+
+        cutoff = self._cutoff()
+        for obj in self._list_objects(prefix):
+            key = obj["Key"]
+            seen_keys.add(key)
+            if key not in metadata_keys and obj["LastModified"] < cutoff:
+                yield key
+
+
+    def find_dangling_metadata(self, user_ids: Optional[list], object_keys: BloomFilter):
+        """
+            Yield metadata records (of the given users, if any) whose S3 object is missing.
+        """
+
+        cutoff = self._cutoff()
+        for item in self._read_metadata(user_ids):
+            key = self.aws.get_s3_key(item)
+            if not key or key in object_keys:
+                continue
+            if not self._is_older_than(item.get("uploaded_at"), cutoff):
+                continue
+            if not self._object_exists(key):
+                yield item
+
+
+    def _list_objects(self, prefix: str):
+
+        paginator = self.aws.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.aws.s3_bucket, Prefix=prefix):
+            yield from page.get("Contents", [])
+
+
+    def _read_metadata(self, user_ids: Optional[list]):
+
+        if user_ids and settings.DYNAMO_USER_INDEX:
+            from boto3.dynamodb.conditions import Key
+
+            for user_id in user_ids:
+                yield from self._paginate(
+                    self.aws.table.query,
+                    IndexName=settings.DYNAMO_USER_INDEX,
+                    KeyConditionExpression=Key("user_id").eq(user_id),
+                )
+            return
+
+        # A FilterExpression would not reduce the items read (or billed), so a single
+        # scan is filtered here for all requested users at once.
+        wanted = set(user_ids) if user_ids else None
+        for item in self._paginate(self.aws.table.scan):
+            if wanted is None or item.get("user_id") in wanted:
+                yield item
+
+
+    def _paginate(self, operation, **kwargs):
+
+        kwargs["ProjectionExpression"] = "image_id, user_id, s3_key, image_url, uploaded_at"
+
+        response = operation(**kwargs)
+        yield from response.get("Items", [])
+        while "LastEvaluatedKey" in response:
+            response = operation(ExclusiveStartKey=response["LastEvaluatedKey"], **kwargs)
+            yield from response.get("Items", [])
+
+
+    def _object_exists(self, key: str) -> bool:
+
+        try:
+            self.aws.s3_client.head_object(Bucket=self.aws.s3_bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+
+    def _delete_objects(self, keys: list) -> int:
+
+        response = self.aws.s3_client.delete_objects(
+            Bucket=self.aws.s3_bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+        errors = response.get("Errors", [])
+        for error in errors:
+            logger.error("reconcile_delete_failed", key=error.get("Key"), error=error.get("Message"))
+        return len(keys) - len(errors)
+
+
+    def _check_capacity(self, name: str, added: int):
+        # Past its capacity a Bloom filter's false-positive rate climbs towards 1, and
+        # the run would quietly stop finding anything.
+        if added > self.expected_keys:
+            logger.warning("reconcile_bloom_filter_overfilled", filter=name,
+                           keys=added, expected_keys=self.expected_keys)
+
+
+    @staticmethod
+    def _user_of(key: str) -> Optional[str]:
+        parts = key.split("/")
+        return parts[1] if len(parts) > 2 and parts[0] + "/" == UPLOADS_PREFIX else None
+
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - self.grace
+
+
+    @staticmethod
+    def _is_older_than(timestamp: Optional[str], cutoff: datetime) -> bool:
+        # uploaded_at is a naive local ISO timestamp (see utils.common.current_timestamp).
+        # Records without a parseable timestamp are treated as new and left alone.
+        try:
+            uploaded_at = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return False
+        return uploaded_at.astimezone(timezone.utc) < cutoff
+
+
+    @staticmethod
+    def _new_section() -> dict:
+        return {"count": 0, "deleted": 0, "sample": []}
+
+
+    @staticmethod
+    def _count(section: dict, key: str):
+        section["count"] += 1
+        if len(section["sample"]) < REPORT_SAMPLE_SIZE:
+            section["sample"].append(key)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Find orphaned S3 objects and dangling DynamoDB metadata.")
+    parser.add_argument("--user-id", action="append", dest="user_ids",
+                        help="Only reconcile this user's prefix (repeatable); defaults to all of uploads/")
+    parser.add_argument("--grace-hours", type=float, default=settings.RECONCILE_GRACE_SECONDS / 3600,
+                        help="Skip objects and records younger than this")
+    parser.add_argument("--expected-keys", type=int, default=settings.RECONCILE_EXPECTED_KEYS,
+                        help="Expected number of keys, used to size the Bloom filters")
+    parser.add_argument("--delete", action="store_true", help="Delete what is found instead of only reporting it")
+    args = parser.parse_args()
+
+    reconciler = Reconciler(grace_seconds=args.grace_hours * 3600, expected_keys=args.expected_keys)
+    report = reconciler.reconcile(args.user_ids, delete=args.delete)
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Optional
+
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+
+from services.logger import logger
+from utils.config import settings
+
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+_THROTTLING_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestLimitExceeded",
+    "ProvisionedThroughputExceededException",
+    "RequestThrottled",
+    "SlowDown",
+}
+
+
+class DeadlineExceededError(TimeoutError):
+    """
+        Raised when an AWS call does not finish within its deadline.
+    """
+
+
+class CircuitOpenError(RuntimeError):
+    """
+        Raised when a call is rejected because the backend's circuit is open.
+    """
+
+
+def set_request_deadline(budget_seconds: float):
+    """
+        Start the deadline for the current request. Returns a token for reset_request_deadline.
+    """
+    return _request_deadline.set(time.monotonic() + budget_seconds)
+
+
+def reset_request_deadline(token):
+    _request_deadline.reset(token)
+
+
+def operation_timeout(timeout: float) -> float:
+    """
+        Clamp an operation timeout to what is left of the current request budget.
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return timeout
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+    return min(timeout, remaining)
+
+
+def is_backend_failure(exc: Exception) -> bool:
+    """
+        Only throttling, 5xx responses, timeouts and connection errors count against
+        the breaker. Anything else (a missing key, invalid parameters, a bug in the
+        caller) says nothing about backend health.
+    """
+    if isinstance(exc, ClientError):
+        error = exc.response.get("Error", {})
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 500)
+        return error.get("Code") in _THROTTLING_CODES or status >= 500
+
+    # botocore's ConnectionError covers EndpointConnectionError and ConnectTimeoutError;
+    # HTTPClientError covers ReadTimeoutError and ConnectionClosedError.
+    return isinstance(exc, (BotoConnectionError, HTTPClientError, ConnectionError, TimeoutError))
+
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies, used to pick the hedging delay.
+    """
+
+    def __init__(self, window_size: int = 200):
+        self._samples = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a rolling window of call outcomes.
+
+    closed: calls pass through and outcomes are recorded.
+    open: calls fail fast with CircuitOpenError until reset_timeout has passed.
+    half_open: a single probe call is let through; success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, error_rate: float, min_calls: int, window_size: int, reset_timeout: float):
+
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+
+        self._outcomes = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self._calls = 0
+        self._failures = 0
+        self._rejected = 0
+        self._queue_timeouts = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """
+            Raise CircuitOpenError if the call must not be attempted.
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._transition(self.HALF_OPEN)
+
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._calls += 1
+            self._outcomes.append(True)
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                self._outcomes.clear()
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._calls += 1
+            self._failures += 1
+            self._outcomes.append(False)
+
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                self._open()
+                return
+
+            if self._state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                failed = self._outcomes.count(False)
+                if failed / len(self._outcomes) >= self.error_rate:
+                    self._open()
+
+    def release(self):
+        """
+            Give back the permit taken by before_call for a call that never reached the
+            backend (it timed out waiting for a worker), without recording an outcome.
+        """
+        with self._lock:
+            self._queue_timeouts += 1
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            window = len(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "error_rate": (self._outcomes.count(False) / window) if window else 0.0,
+                "window_calls": window,
+                "calls_total": self._calls,
+                "failures_total": self._failures,
+                "rejected_total": self._rejected,
+                "queue_timeouts_total": self._queue_timeouts,
+                "opened_total": self._times_opened,
+            }
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        if state != self._state:
+            logger.warning("circuit_breaker", breaker=self.name, previous=self._state, state=state)
+            self._state = state
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+        Return the process-wide breaker for a backend, creating it on first use.
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                error_rate=settings.BREAKER_ERROR_RATE,
+                min_calls=settings.BREAKER_MIN_CALLS,
+                window_size=settings.BREAKER_WINDOW_SIZE,
+                reset_timeout=settings.BREAKER_RESET_SECONDS,
+            )
+        return _breakers[name]
+
+
+def breaker_metrics() -> list:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
+
+
+def _get_executor(pool: str) -> ThreadPoolExecutor:
+    """
+        Return the worker pool for a backend (or for uploads), creating it on first use.
+        Separate pools keep slow uploads or one degraded backend from starving the others.
+    """
+    with _executors_lock:
+        if pool not in _executors:
+            _executors[pool] = ThreadPoolExecutor(max_workers=settings.AWS_MAX_CONCURRENCY,
+                                                  thread_name_prefix=f"aws-{pool}")
+        return _executors[pool]
+
+
+def _record(breaker: CircuitBreaker, exc: Optional[Exception]):
+    if exc is None or not is_backend_failure(exc):
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+
+def call_with_deadline(breaker: CircuitBreaker, timeout: float, fn, *args, **kwargs):
+    """
+        Run fn through the breaker, giving up after timeout (clamped to the request budget).
+    """
+    return call_with_timeout(breaker, operation_timeout(timeout), fn, *args, **kwargs)
+
+
+def call_with_timeout(breaker: CircuitBreaker, timeout: float, fn, *args, pool: Optional[str] = None, **kwargs):
+    """
+        Run fn through the breaker, giving up after timeout regardless of the request budget.
+        Calls run on the pool named after the breaker unless another pool is given.
+    """
+    breaker.before_call()
+
+    future = _get_executor(pool or breaker.name).submit(fn, *args, **kwargs)
+    done, _ = wait([future], timeout=timeout)
+    if not done:
+        if future.cancel():
+            # Still queued: the backend was never called, so this says nothing about it.
+            breaker.release()
+            raise DeadlineExceededError(f"{breaker.name} call waited {timeout:.3f}s for a worker")
+        breaker.record_failure()
+        raise DeadlineExceededError(f"{breaker.name} call exceeded {timeout:.3f}s deadline")
+
+    exc = future.exception()
+    _record(breaker, exc)
+    if exc is not None:
+        raise exc
+    return future.result()
+
+
+def hedged_call(breaker: CircuitBreaker, timeout: float, hedge_delay: float,
+                tracker: Optional[LatencyTracker], fn, *args, **kwargs):
+    """
+        Run an idempotent fn and, if it is still outstanding after hedge_delay, send a
+        second identical call. The first successful answer wins.
+
+        tracker records the latency of the primary attempt only, even when the hedge
+        wins, so the delay derived from it follows the backend rather than drifting
+        down to the faster of two requests.
+    """
+    timeout = operation_timeout(timeout)
+    breaker.before_call()
+
+    executor = _get_executor(breaker.name)
+    start = time.monotonic()
+    primary = executor.submit(fn, *args, **kwargs)
+    if tracker is not None:
+        primary.add_done_callback(
+            lambda future: future.cancelled() or tracker.record(time.monotonic() - start)
+        )
+    pending = {primary}
+    hedged = False
+    errors = []
+
+    while pending:
+        remaining = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            break
+
+        wait_for = remaining if hedged else min(remaining, hedge_delay)
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            exc = future.exception()
+            if exc is None:
+                for other in pending:
+                    other.cancel()
+                breaker.record_success()
+                return future.result()
+            errors.append(exc)
+
+        if not pending and errors:
+            _record(breaker, errors[-1])
+            raise errors[-1]
+
+        if not hedged and not done:
+            hedged = True
+            pending.add(executor.submit(fn, *args, **kwargs))
+
+    # cancel() only succeeds for attempts that never left the queue.
+    started = [future for future in pending if not future.cancel()]
+    if not started and not errors:
+        breaker.release()
+        raise DeadlineExceededError(f"{breaker.name} call waited {timeout:.3f}s for a worker")
+
+    breaker.record_failure()
+    raise DeadlineExceededError(f"{breaker.name} call exceeded {timeout:.3f}s deadline")
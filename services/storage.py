@@ -0,0 +1,94 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional
+
+from utils.common import generate_uuid
+from utils.config import settings
+
+
+class StorageBackend(ABC):
+    """
+    Storage for image files and their metadata, as used by the API routes.
+
+    AWSService (S3 + DynamoDB) is the production backend; InMemoryStorage and
+    LocalStorage run without network access for tests, profiling and load tests.
+    """
+
+    def generate_image_key(self, user_id: str, filename: str):
+        """
+            Return (key, image_id) for a new upload. Raises ValueError when user_id or the
+            file extension would not stay a single path segment of the key.
+        """
+
+        ext = filename.split(".")[-1]
+        if not user_id or user_id in (".", "..") or any(sep in user_id for sep in "/\\"):
+            raise ValueError(f"Invalid user_id: {user_id}")
+        if any(sep in ext for sep in "/\\"):
+            raise ValueError(f"Invalid file extension: {ext}")
+        image_id = generate_uuid()
+        key = f"uploads/{user_id}/{image_id}.{ext}"
+        return key, image_id
+
+
+    def get_s3_key(self, metadata: dict) -> Optional[str]:
+        """
+            Return the storage key of an image record.
+        """
+        return metadata.get("s3_key")
+
+
+    @abstractmethod
+    def get_image_url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def upload_image_to_s3(self, file_obj, key: str, content_type: str):
+        ...
+
+    @abstractmethod
+    def save_image_metadata(self, metadata: dict):
+        ...
+
+    @abstractmethod
+    def query_images(self, filters: dict) -> list:
+        """
+            Return metadata records matching all given filters ("user_id", "tag").
+        """
+        ...
+
+    @abstractmethod
+    def get_image_metadata(self, image_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def generate_presigned_url(self, s3_key: str, expires_in: int = 3600) -> str:
+        ...
+
+    @abstractmethod
+    def delete_image_from_s3(self, s3_key: str):
+        ...
+
+    @abstractmethod
+    def delete_metadata_from_dynamo(self, image_id: str):
+        ...
+
+
+@lru_cache(maxsize=None)
+def get_storage_backend() -> StorageBackend:
+    """
+        Return the process-wide backend selected by STORAGE_BACKEND ("aws", "memory" or "local").
+    """
+
+    backend = settings.STORAGE_BACKEND.lower()
+
+    if backend == "aws":
+        from services.aws_service import AWSService
+        return AWSService()
+    if backend == "memory":
+        from services.memory_storage import InMemoryStorage
+        return InMemoryStorage()
+    if backend == "local":
+        from services.local_storage import LocalStorage
+        return LocalStorage(settings.LOCAL_STORAGE_DIR)
+
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
@@ -2,6 +2,8 @@ import io
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 from main import app
+from services.resilience import CircuitOpenError, DeadlineExceededError, operation_timeout
+from utils.config import settings
 
 client = TestClient(app)
 
@@ -21,6 +23,16 @@ def test_upload_image(mock_save_metadata, mock_upload_image):
     assert response.json()["message"] == "Image uploaded successfully"
 
 
+@patch("services.aws_service.AWSService.upload_image_to_s3")
+def test_upload_image_invalid_user_id(mock_upload_image):
+    files = {"image": ("test.jpg", io.BytesIO(b"fake image data"), "image/jpeg")}
+
+    response = client.post("/api/v1/upload", files=files, data={"user_id": "../../etc"})
+
+    assert response.status_code == 400
+    assert "Invalid user_id" in response.json()["detail"]
+    mock_upload_image.assert_not_called()
+
 @patch("services.aws_service.AWSService.get_image_metadata")
 @patch("services.aws_service.AWSService.generate_presigned_url")
 def test_get_image_success(mock_presigned_url, mock_metadata):
@@ -198,3 +210,45 @@ def test_delete_image_internal_error(mock_get_metadata):
     assert response.status_code == 500
     assert "Failed to delete image" in response.json()["detail"]
 
+
+
+@patch("services.aws_service.AWSService.get_image_metadata")
+def test_get_image_circuit_open(mock_metadata):
+    mock_metadata.side_effect = CircuitOpenError("dynamodb circuit is open")
+
+    response = client.get("/api/v1/images/abc123")
+
+    assert response.status_code == 503
+
+
+@patch("services.aws_service.AWSService.query_images")
+def test_list_images_deadline_exceeded(mock_query):
+    mock_query.side_effect = DeadlineExceededError("dynamodb call exceeded 3.000s deadline")
+
+    response = client.get("/api/v1/images")
+
+    assert response.status_code == 504
+
+
+def test_metrics_exposes_breaker_state():
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    names = {breaker["name"] for breaker in response.json()["circuit_breakers"]}
+    assert {"s3", "dynamodb"} <= names
+
+
+@patch("services.aws_service.AWSService.get_image_metadata")
+def test_request_deadline_reaches_route_threadpool(mock_metadata):
+    timeouts = []
+
+    def capture_timeout(image_id):
+        timeouts.append(operation_timeout(1000))
+        return None
+
+    mock_metadata.side_effect = capture_timeout
+
+    response = client.get("/api/v1/images/abc123")
+
+    assert response.status_code == 404
+    assert timeouts[0] <= settings.REQUEST_TIMEOUT_SECONDS
@@ -0,0 +1,22 @@
+import threading
+
+from services.aws_service import AWSService
+
+
+def test_clients_are_created_once_under_concurrent_first_use():
+    aws = AWSService()
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def first_use():
+        barrier.wait()
+        clients.append((aws.s3_client, aws.table))
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(s3) for s3, _ in clients}) == 1
+    assert len({id(table) for _, table in clients}) == 1
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from services.aws_service import AWSService
+from services.reconciler import Reconciler
+from utils.bloom import BloomFilter
+
+OLD = datetime.now(timezone.utc) - timedelta(days=2)
+NEW = datetime.now(timezone.utc)
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = dict(objects)
+
+    def get_paginator(self, name):
+        s3 = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(key for key in s3.objects if key.startswith(Prefix))
+                for start in range(0, len(keys), 2):
+                    yield {"Contents": [{"Key": key, "LastModified": s3.objects[key]} for key in keys[start:start + 2]]}
+
+        return Paginator()
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+        return {}
+
+
+class FakeTable:
+    def __init__(self, items, index_projection=None):
+        self.items = {item["image_id"]: item for item in items}
+        self.index_projection = index_projection
+        self.scans = 0
+        self.queries = []
+
+    def scan(self, ExclusiveStartKey=None, **kwargs):
+        self.scans += 1
+        return {"Items": list(self.items.values())}
+
+    def query(self, IndexName, KeyConditionExpression, ExclusiveStartKey=None, **kwargs):
+        user_id = KeyConditionExpression.get_expression()["values"][1]
+        self.queries.append((IndexName, user_id))
+        items = [item for item in self.items.values() if item["user_id"] == user_id]
+        if self.index_projection is not None:
+            items = [{name: item[name] for name in self.index_projection if name in item} for item in items]
+        return {"Items": items}
+
+    def delete_item(self, Key):
+        self.items.pop(Key["image_id"], None)
+
+
+def make_reconciler(objects, items):
+    aws = AWSService()
+    aws._s3_client = FakeS3(objects)
+    aws._table = FakeTable(items)
+    return Reconciler(aws, grace_seconds=3600, expected_keys=1000), aws
+
+
+def record(image_id, user_id, key, uploaded_at=OLD):
+    return {"image_id": image_id, "user_id": user_id, "s3_key": key,
+            "uploaded_at": uploaded_at.astimezone().replace(tzinfo=None).isoformat()}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    keys = [f"uploads/user/{i}.jpg" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"uploads/other/{i}.jpg" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_reports_orphans_past_grace_period():
+    reconciler, _ = make_reconciler(
+        objects={
+            "uploads/u1/a.jpg": OLD,
+            "uploads/u1/orphan.jpg": OLD,
+            "uploads/u1/fresh.jpg": NEW,
+        },
+        items=[
+            record("a", "u1", "uploads/u1/a.jpg"),
+            record("missing", "u1", "uploads/u1/missing.jpg"),
+            record("recent", "u1", "uploads/u1/recent.jpg", uploaded_at=NEW),
+        ],
+    )
+
+    report = reconciler.reconcile()
+
+    assert report["orphaned_objects"]["sample"] == ["uploads/u1/orphan.jpg"]
+    assert report["dangling_metadata"]["sample"] == ["missing"]
+    assert report["orphaned_objects"]["deleted"] == 0
+
+
+def test_delete_removes_orphans_within_user_prefixes():
+    reconciler, aws = make_reconciler(
+        objects={
+            "uploads/u1/orphan.jpg": OLD,
+            "uploads/u2/orphan.jpg": OLD,
+            "uploads/u3/orphan.jpg": OLD,
+        },
+        items=[
+            record("missing", "u1", "uploads/u1/missing.jpg"),
+            record("other", "u3", "uploads/u3/other.jpg"),
+        ],
+    )
+
+    report = reconciler.reconcile(user_ids=["u1", "u2"], delete=True)
+
+    assert report["prefixes"] == ["uploads/u1/", "uploads/u2/"]
+    assert report["orphaned_objects"]["deleted"] == 2
+    assert report["dangling_metadata"]["deleted"] == 1
+    assert set(aws.s3_client.objects) == {"uploads/u3/orphan.jpg"}
+    assert set(aws.table.items) == {"other"}
+    # One scan per metadata pass, shared by all requested users.
+    assert aws.table.scans == 2
+
+
+def test_user_index_is_queried_instead_of_scanning():
+    reconciler, aws = make_reconciler(
+        objects={"uploads/u1/a.jpg": OLD},
+        items=[
+            record("a", "u1", "uploads/u1/a.jpg"),
+            record("missing", "u2", "uploads/u2/missing.jpg"),
+        ],
+    )
+
+    with patch("services.reconciler.settings.DYNAMO_USER_INDEX", "user_id-index"):
+        report = reconciler.reconcile(user_ids=["u1"])
+
+    assert report["orphaned_objects"]["count"] == 0
+    assert report["dangling_metadata"]["count"] == 0
+    assert aws.table.scans == 0
+    assert aws.table.queries == [("user_id-index", "u1"), ("user_id-index", "u1")]
+
+
+@pytest.mark.parametrize("url_format", [
+    "http://localhost:4566/{bucket}/{key}",
+    "https://{bucket}.s3.us-east-1.amazonaws.com/{key}",
+])
+def test_legacy_records_are_matched_by_image_url(url_format):
+    reconciler, aws = make_reconciler(objects={"uploads/u1/a.jpg": OLD}, items=[])
+    image_url = url_format.format(bucket=aws.s3_bucket, key="uploads/u1/a.jpg")
+    aws.table.items["a"] = {"image_id": "a", "user_id": "u1", "image_url": image_url,
+                            "uploaded_at": OLD.isoformat()}
+
+    report = reconciler.reconcile()
+
+    assert report["orphaned_objects"]["count"] == 0
+    assert report["dangling_metadata"]["count"] == 0
+
+
+def test_keys_only_index_never_deletes_live_objects():
+    reconciler, aws = make_reconciler(
+        objects={"uploads/u1/a.jpg": OLD, "uploads/u1/b.jpg": OLD},
+        items=[
+            record("a", "u1", "uploads/u1/a.jpg"),
+            record("b", "u1", "uploads/u1/b.jpg"),
+        ],
+    )
+    aws.table.index_projection = ("image_id", "user_id")
+
+    with patch("services.reconciler.settings.DYNAMO_USER_INDEX", "user_id-index"):
+        report = reconciler.reconcile(user_ids=["u1"], delete=True)
+
+    assert report["unresolved_metadata"]["count"] == 2
+    assert report["orphaned_objects"]["count"] == 0
+    assert report["orphaned_objects"]["skipped"] == 2
+    assert set(aws.s3_client.objects) == {"uploads/u1/a.jpg", "uploads/u1/b.jpg"}
+
+
+def test_unresolvable_image_url_only_blocks_its_users_prefix():
+    reconciler, aws = make_reconciler(
+        objects={"uploads/u1/a.jpg": OLD, "uploads/u2/orphan.jpg": OLD},
+        items=[{"image_id": "a", "user_id": "u1",
+                "image_url": "https://other-bucket.s3.us-east-1.amazonaws.com/uploads/u1/a.jpg",
+                "uploaded_at": OLD.isoformat()}],
+    )
+
+    report = reconciler.reconcile(delete=True)
+
+    assert report["unresolved_metadata"]["sample"] == ["a"]
+    assert report["orphaned_objects"]["sample"] == ["uploads/u2/orphan.jpg"]
+    assert set(aws.s3_client.objects) == {"uploads/u1/a.jpg"}
+
+
+def test_warns_when_bloom_filter_is_overfilled():
+    reconciler, _ = make_reconciler(
+        objects={f"uploads/u1/{i}.jpg": OLD for i in range(3)},
+        items=[record(str(i), "u1", f"uploads/u1/{i}.jpg") for i in range(3)],
+    )
+    reconciler.expected_keys = 2
+
+    with patch("services.reconciler.logger") as logger:
+        reconciler.reconcile()
+
+    warnings = [call.args[0] for call in logger.warning.call_args_list]
+    assert warnings.count("reconcile_bloom_filter_overfilled") == 2
@@ -0,0 +1,234 @@
+import io
+import threading
+import time
+
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError, ParamValidationError, ReadTimeoutError
+
+from services.aws_service import AWSService
+from services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    LatencyTracker,
+    call_with_deadline,
+    call_with_timeout,
+    hedged_call,
+    reset_request_deadline,
+    set_request_deadline,
+)
+
+
+def make_breaker(**overrides):
+    options = {"error_rate": 0.5, "min_calls": 4, "window_size": 10, "reset_timeout": 60}
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def fail():
+    raise ConnectionError("backend unavailable")
+
+
+def test_breaker_opens_when_error_rate_crosses_threshold():
+    breaker = make_breaker()
+
+    call_with_deadline(breaker, 1, lambda: "ok")
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            call_with_deadline(breaker, 1, fail)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        call_with_deadline(breaker, 1, lambda: "ok")
+    assert breaker.snapshot()["rejected_total"] == 1
+
+
+def test_breaker_half_open_probe_closes_circuit():
+    breaker = make_breaker(min_calls=1, reset_timeout=0)
+
+    with pytest.raises(ConnectionError):
+        call_with_deadline(breaker, 1, fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert call_with_deadline(breaker, 1, lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_do_not_trip_breaker():
+    breaker = make_breaker(min_calls=1)
+
+    def missing():
+        raise ClientError(
+            {"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {"HTTPStatusCode": 404}},
+            "GetObject",
+        )
+
+    with pytest.raises(ClientError):
+        call_with_deadline(breaker, 1, missing)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_caller_errors_do_not_trip_breaker():
+    breaker = make_breaker(min_calls=2)
+
+    def invalid():
+        raise ParamValidationError(report="Missing required parameter")
+
+    def buggy():
+        raise KeyError("image_url")
+
+    for fn in (invalid, invalid, buggy):
+        with pytest.raises((ParamValidationError, KeyError)):
+            call_with_deadline(breaker, 1, fn)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize("error", [
+    EndpointConnectionError(endpoint_url="http://localhost:4566"),
+    ReadTimeoutError(endpoint_url="http://localhost:4566"),
+])
+def test_transport_errors_trip_breaker(error):
+    breaker = make_breaker(min_calls=2)
+
+    def unreachable():
+        raise error
+
+    for _ in range(2):
+        with pytest.raises(type(error)):
+            call_with_deadline(breaker, 1, unreachable)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_call_exceeding_deadline_raises_and_counts_as_failure():
+    breaker = make_breaker()
+
+    with pytest.raises(DeadlineExceededError):
+        call_with_deadline(breaker, 0.05, time.sleep, 0.5)
+    assert breaker.snapshot()["failures_total"] == 1
+
+
+def test_operation_timeout_is_clamped_to_request_budget():
+    breaker = make_breaker()
+    token = set_request_deadline(0.05)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            call_with_deadline(breaker, 10, time.sleep, 0.5)
+    finally:
+        reset_request_deadline(token)
+
+
+def test_hedged_call_uses_first_answer():
+    breaker = make_breaker()
+    tracker = LatencyTracker()
+    calls = []
+    lock = threading.Lock()
+
+    def read():
+        with lock:
+            calls.append(len(calls))
+            attempt = calls[-1]
+        if attempt == 0:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    started = time.monotonic()
+    assert hedged_call(breaker, 2, 0.02, tracker, read) == "fast"
+    assert time.monotonic() - started < 0.4
+    assert len(calls) == 2
+
+
+def test_hedge_delay_tracks_primary_latency():
+    breaker = make_breaker()
+    tracker = LatencyTracker()
+    calls = []
+    lock = threading.Lock()
+    primary_done = threading.Event()
+
+    def read():
+        with lock:
+            calls.append(len(calls))
+            attempt = calls[-1]
+        if attempt == 0:
+            time.sleep(0.2)
+            primary_done.set()
+            return "slow"
+        return "fast"
+
+    assert hedged_call(breaker, 2, 0.02, tracker, read) == "fast"
+    primary_done.wait(1)
+    time.sleep(0.05)
+
+    assert tracker.percentile(0.95, min_samples=1) >= 0.2
+
+
+def test_hedged_call_without_hedge_when_primary_is_fast():
+    breaker = make_breaker()
+    calls = []
+
+    def read():
+        calls.append(1)
+        return "ok"
+
+    assert hedged_call(breaker, 1, 0.5, None, read) == "ok"
+    assert len(calls) == 1
+
+
+def test_upload_timeout_ignores_request_budget_and_cancels_reads():
+    readers = []
+
+    class SlowUploadClient:
+        def upload_fileobj(self, reader, bucket, key, ExtraArgs):
+            readers.append(reader)
+            time.sleep(0.3)
+
+    aws = AWSService()
+    aws._upload_s3_client = SlowUploadClient()
+    token = set_request_deadline(0.01)
+    try:
+        with patch("services.aws_service.settings.AWS_UPLOAD_TIMEOUT_SECONDS", 0.1):
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceededError):
+                aws.upload_image_to_s3(io.BytesIO(b"data"), "uploads/u1/a.jpg", "image/jpeg")
+            assert time.monotonic() - started >= 0.1
+    finally:
+        reset_request_deadline(token)
+
+    with pytest.raises(IOError):
+        readers[0].read()
+
+
+def test_queue_timeout_does_not_count_against_breaker():
+    breaker = make_breaker(min_calls=1)
+
+    with patch("services.resilience.settings.AWS_MAX_CONCURRENCY", 1):
+        busy = threading.Thread(target=call_with_timeout,
+                                args=(make_breaker(), 1, time.sleep, 0.3), kwargs={"pool": "queue-test"})
+        busy.start()
+        time.sleep(0.05)
+        with pytest.raises(DeadlineExceededError, match="waited"):
+            call_with_timeout(breaker, 0.05, lambda: "ok", pool="queue-test")
+        busy.join()
+
+    snapshot = breaker.snapshot()
+    assert snapshot["failures_total"] == 0
+    assert snapshot["queue_timeouts_total"] == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stalled_upload_pool_does_not_starve_other_calls():
+    uploads = make_breaker()
+    reads = CircuitBreaker("isolated-reads", error_rate=0.5, min_calls=1, window_size=10, reset_timeout=60)
+
+    with patch("services.resilience.settings.AWS_MAX_CONCURRENCY", 1):
+        busy = threading.Thread(target=call_with_timeout,
+                                args=(uploads, 1, time.sleep, 0.3), kwargs={"pool": "isolated-uploads"})
+        busy.start()
+        time.sleep(0.05)
+        assert call_with_deadline(reads, 0.05, lambda: "ok") == "ok"
+        busy.join()
+
+    assert reads.state == CircuitBreaker.CLOSED
+
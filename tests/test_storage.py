@@ -0,0 +1,80 @@
+import io
+from unittest.mock import patch
+
+import pytest
+
+from services.local_storage import LocalStorage
+from services.memory_storage import InMemoryStorage
+from services.storage import get_storage_backend
+
+
+@pytest.fixture(params=["memory", "local"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStorage()
+    return LocalStorage(str(tmp_path))
+
+
+def save(storage, image_id, user_id, tags):
+    key = f"uploads/{user_id}/{image_id}.jpg"
+    storage.upload_image_to_s3(io.BytesIO(b"fake image data"), key, "image/jpeg")
+    storage.save_image_metadata({
+        "image_id": image_id,
+        "user_id": user_id,
+        "tags": tags,
+        "image_url": storage.get_image_url(key),
+        "s3_key": key,
+        "uploaded_at": "2025-10-22T09:00:00",
+    })
+    return key
+
+
+def test_query_images_uses_filters(storage):
+    save(storage, "a", "user_001", ["travel", "sunset"])
+    save(storage, "b", "user_001", ["food"])
+    save(storage, "c", "user_002", ["travel"])
+
+    assert [image["image_id"] for image in storage.query_images({})] == ["a", "b", "c"]
+    assert [image["image_id"] for image in storage.query_images({"user_id": "user_001"})] == ["a", "b"]
+    assert [image["image_id"] for image in storage.query_images({"tag": "travel"})] == ["a", "c"]
+    assert [image["image_id"] for image in storage.query_images({"user_id": "user_002", "tag": "travel"})] == ["c"]
+    assert storage.query_images({"tag": "missing"}) == []
+
+
+def test_saving_again_reindexes_tags(storage):
+    save(storage, "a", "user_001", ["travel"])
+    save(storage, "a", "user_001", ["food"])
+
+    assert storage.query_images({"tag": "travel"}) == []
+    assert storage.get_image_metadata("a")["tags"] == ["food"]
+
+
+def test_delete_removes_object_and_metadata(storage):
+    key = save(storage, "a", "user_001", ["travel"])
+
+    assert storage.generate_presigned_url(key)
+    storage.delete_image_from_s3(key)
+    storage.delete_metadata_from_dynamo("a")
+
+    assert storage.get_image_metadata("a") is None
+    assert storage.query_images({"user_id": "user_001"}) == []
+    assert storage.query_images({"tag": "travel"}) == []
+
+
+def test_local_storage_writes_files_and_rejects_escaping_keys(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    key = save(storage, "a", "user_001", [])
+
+    assert (tmp_path / "objects" / key).read_bytes() == b"fake image data"
+    with pytest.raises(ValueError):
+        storage.upload_image_to_s3(io.BytesIO(b"x"), "uploads/../../escape.jpg", "image/jpeg")
+
+
+def test_backend_is_selected_from_settings():
+    get_storage_backend.cache_clear()
+    try:
+        with patch("services.storage.settings.STORAGE_BACKEND", "memory"):
+            assert isinstance(get_storage_backend(), InMemoryStorage)
+            assert get_storage_backend() is get_storage_backend()
+    finally:
+        get_storage_backend.cache_clear()
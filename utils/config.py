@@ -1,8 +1,14 @@
 import os
-from dotenv import load_dotenv
+from typing import Optional
 from pydantic_settings import BaseSettings
 
-load_dotenv()
+# Serverless runtimes inject configuration through the environment, so no .env
+# file is searched for or read there; a stray one in the bundle cannot override it.
+_SERVERLESS = os.getenv("SERVERLESS", "false").lower() == "true"
+
+if not _SERVERLESS:
+    from dotenv import load_dotenv
+    load_dotenv()
 
 
 class Settings(BaseSettings):
@@ -14,11 +20,43 @@ class Settings(BaseSettings):
 
     LOCALSTACK_AUTH_TOKEN: str = os.getenv('LOCALSTACK_AUTH_TOKEN')
     LOG_LEVEL: str = os.getenv("LOG_LEVEL")
-    LOG_DIR: str = os.getenv("LOG_DIR")
+    # Not needed in serverless mode, where logs only go to stdout.
+    LOG_DIR: Optional[str] = os.getenv("LOG_DIR")
+
+    SERVERLESS: bool = _SERVERLESS
+
+    # Storage backend used by the routes: "aws" (S3 + DynamoDB), "memory" or "local".
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "aws")
+    LOCAL_STORAGE_DIR: str = os.getenv("LOCAL_STORAGE_DIR", "data")
+
+    # Request budget and per-operation deadlines for AWS calls, in seconds.
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "10"))
+    AWS_OPERATION_TIMEOUT_SECONDS: float = float(os.getenv("AWS_OPERATION_TIMEOUT_SECONDS", "3"))
+    AWS_UPLOAD_TIMEOUT_SECONDS: float = float(os.getenv("AWS_UPLOAD_TIMEOUT_SECONDS", "30"))
+    # Worker threads per pool (one pool each for S3, DynamoDB and S3 uploads).
+    AWS_MAX_CONCURRENCY: int = int(os.getenv("AWS_MAX_CONCURRENCY", "32"))
+
+    # Circuit breaker: opens once BREAKER_ERROR_RATE of the last BREAKER_WINDOW_SIZE
+    # calls failed (with at least BREAKER_MIN_CALLS recorded).
+    BREAKER_ERROR_RATE: float = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "20"))
+    BREAKER_WINDOW_SIZE: int = int(os.getenv("BREAKER_WINDOW_SIZE", "100"))
+    BREAKER_RESET_SECONDS: float = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+    # Hedged reads: a second request is sent once the first has been outstanding
+    # for the observed p95 latency (HEDGE_DELAY_MS until enough samples exist).
+    HEDGED_READS: bool = os.getenv("HEDGED_READS", "false").lower() == "true"
+    HEDGE_DELAY_MS: float = float(os.getenv("HEDGE_DELAY_MS", "50"))
+
+    # Orphan reconciliation between S3 and DynamoDB.
+    RECONCILE_GRACE_SECONDS: float = float(os.getenv("RECONCILE_GRACE_SECONDS", "86400"))
+    RECONCILE_EXPECTED_KEYS: int = int(os.getenv("RECONCILE_EXPECTED_KEYS", "10000000"))
+    # Optional GSI on user_id; lets per-user reconciliation query instead of scanning.
+    DYNAMO_USER_INDEX: Optional[str] = os.getenv("DYNAMO_USER_INDEX")
 
 
 
     class Config:
-        env_file = "../.env"
+        env_file = None if _SERVERLESS else "../.env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()